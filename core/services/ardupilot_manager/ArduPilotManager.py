@@ -1,10 +1,11 @@
 import asyncio
 import os
 import pathlib
-import subprocess
+import shlex
 import time
-from copy import deepcopy
-from typing import Any, List, Optional, Set
+from functools import cache
+from operator import attrgetter
+from typing import List, Optional, Set, Tuple
 
 import psutil
 from commonwealth.mavlink_comm.VehicleManager import VehicleManager
@@ -37,12 +38,72 @@ from typedefs import (
 )
 
 
+@cache
+def default_endpoints(owner: str) -> Tuple[Endpoint, ...]:
+    """Endpoints always available on the mavlink router. Built once, as Endpoint creation goes through validation."""
+    return (
+        Endpoint(
+            name="GCS Server Link",
+            owner=owner,
+            connection_type=EndpointType.UDPServer,
+            place="0.0.0.0",
+            argument=14550,
+            persistent=True,
+            enabled=False,
+        ),
+        Endpoint(
+            name="GCS Client Link",
+            owner=owner,
+            connection_type=EndpointType.UDPClient,
+            place="192.168.2.1",
+            argument=14550,
+            persistent=True,
+            enabled=True,
+        ),
+        Endpoint(
+            name="MAVLink2Rest",
+            owner=owner,
+            connection_type=EndpointType.UDPClient,
+            place="127.0.0.1",
+            argument=14000,
+            persistent=True,
+            protected=True,
+        ),
+        Endpoint(
+            name="Internal Link",
+            owner=owner,
+            connection_type=EndpointType.TCPServer,
+            place="127.0.0.1",
+            argument=5777,
+            persistent=True,
+            protected=True,
+            overwrite_settings=True,
+        ),
+        Endpoint(
+            name="Ping360 Heading",
+            owner=owner,
+            connection_type=EndpointType.UDPServer,
+            place="0.0.0.0",
+            argument=14660,
+            persistent=True,
+            protected=True,
+        ),
+    )
+
+
 class ArduPilotManager(metaclass=Singleton):
     # pylint: disable=too-many-instance-attributes
     def __init__(self) -> None:
         self.settings = Settings()
         self.settings.create_app_folders()
         self._current_board: Optional[FlightController] = None
+        self._should_be_running = False
+        # Set whenever something that may require an Ardupilot restart happens, so the watchdog doesn't need to poll
+        self._restart_event = asyncio.Event()
+        self._subprocess_watcher: Optional["asyncio.Task[None]"] = None
+        self._last_restart_time: Optional[float] = None
+        # Endpoints parsed from the configuration, kept in sync by _save_endpoints_to_configuration()
+        self._configuration_endpoints: Optional[Set[Endpoint]] = None
 
         # Load settings and do the initial configuration
         if self.settings.load():
@@ -53,7 +114,8 @@ class ArduPilotManager(metaclass=Singleton):
 
     async def setup(self) -> None:
         # This is the logical continuation of __init__(), extracted due to its async nature
-        self.configuration = deepcopy(self.settings.content)
+        # Configuration entries are only ever replaced, never mutated in place, so a shallow copy is enough
+        self.configuration = dict(self.settings.content)
         self.mavlink_manager = MavlinkManager(self.load_preferred_router())
         if not self.load_preferred_router():
             await self.set_preferred_router(self.mavlink_manager.available_interfaces()[0].name())
@@ -61,10 +123,12 @@ class ArduPilotManager(metaclass=Singleton):
         self.mavlink_manager.set_logdir(self.settings.log_path)
 
         self._load_endpoints()
-        self.ardupilot_subprocess: Optional[Any] = None
+        self.ardupilot_subprocess: Optional[asyncio.subprocess.Process] = None
         self.firmware_manager = FirmwareManager(
             self.settings.firmware_folder, self.settings.defaults_folder, self.settings.user_firmware_folder
         )
+        # Firmware paths don't change during runtime, so there's no need to rebuild them on every process scan
+        self._firmware_paths = [str(self.firmware_manager.firmware_path(platform)) for platform in Platform]
         self.vehicle_manager = VehicleManager()
 
         self.should_be_running = False
@@ -89,17 +153,55 @@ class ArduPilotManager(metaclass=Singleton):
         except Exception as error:
             logger.warning(f"Failed to remove logs: {error}")
 
+    @property
+    def should_be_running(self) -> bool:
+        return self._should_be_running
+
+    @should_be_running.setter
+    def should_be_running(self, value: bool) -> None:
+        self._should_be_running = value
+        self._restart_event.set()
+
+    async def _spawn_ardupilot(self, command_line: List[str]) -> None:
+        """Start Ardupilot subprocess and wake the auto-restart routine up as soon as it exits."""
+        process = await asyncio.create_subprocess_exec(*command_line, cwd=self.settings.firmware_folder)
+        self.ardupilot_subprocess = process
+
+        async def wake_up_on_exit() -> None:
+            await process.wait()
+            self._restart_event.set()
+
+        self._subprocess_watcher = asyncio.create_task(wake_up_on_exit())
+
     async def auto_restart_ardupilot(self) -> None:
         """Auto-restart Ardupilot when it's not running but was supposed to."""
+        # The timeout is only a safety net for processes that are not our children (e.g.: left from older sessions)
+        timeout = 30.0
         while True:
+            try:
+                await asyncio.wait_for(self._restart_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._restart_event.clear()
+            timeout = 30.0
+
             process_not_running = (
-                self.ardupilot_subprocess is not None and self.ardupilot_subprocess.poll() is not None
+                self.ardupilot_subprocess is not None and self.ardupilot_subprocess.returncode is not None
             ) or len(self.running_ardupilot_processes()) == 0
             needs_restart = self.should_be_running and (
                 self.current_board is None
                 or (self.current_board.type in [PlatformType.SITL, PlatformType.Linux] and process_not_running)
             )
             if needs_restart:
+                # Don't restart more often than every few seconds, even if Ardupilot keeps crashing right after starting
+                if self._last_restart_time is not None:
+                    remaining = self._last_restart_time + 5.0 - time.monotonic()
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+                        # Things may have changed while waiting, so check again before restarting
+                        self._restart_event.set()
+                        continue
+                self._last_restart_time = time.monotonic()
                 logger.debug("Restarting ardupilot...")
                 try:
                     await self.kill_ardupilot()
@@ -109,7 +211,9 @@ class ArduPilotManager(metaclass=Singleton):
                     await self.start_ardupilot()
                 except Exception as error:
                     logger.warning(f"Could not start Ardupilot: {error}")
-            await asyncio.sleep(5.0)
+                # Restarting sets the event on its own, and a failed start should be retried in a few seconds
+                self._restart_event.clear()
+                timeout = 5.0
 
     async def start_mavlink_manager_watchdog(self) -> None:
         await self.mavlink_manager.auto_restart_router()
@@ -172,16 +276,15 @@ class ArduPilotManager(metaclass=Singleton):
                 logger.error(e)
         return serials
 
-    def get_serial_cmdlines(self) -> str:
-        cmdlines = [f"-{entry.port} {entry.endpoint}" for entry in self.get_serials()]
-        return " ".join(cmdlines)
+    def get_serial_cmdlines(self) -> List[str]:
+        return [argument for entry in self.get_serials() for argument in (f"-{entry.port}", entry.endpoint)]
 
-    def get_default_params_cmdline(self, platform: Platform) -> str:
+    def get_default_params_cmdline(self, platform: Platform) -> List[str]:
         # check if file exists and return it's path as --defaults parameter
         default_params_path = self.firmware_manager.default_user_params_path(platform)
         if default_params_path.is_file():
-            return f"--defaults {default_params_path}"
-        return ""
+            return ["--defaults", str(default_params_path)]
+        return []
 
     async def start_linux_board(self, board: FlightController) -> None:
         self._current_board = board
@@ -209,11 +312,6 @@ class ArduPilotManager(metaclass=Singleton):
             protected=True,
         )
 
-        # Run ardupilot inside while loop to avoid exiting after reboot command
-        ## Can be changed back to a simple command after https://github.com/ArduPilot/ardupilot/issues/17572
-        ## gets fixed.
-        # pylint: disable=consider-using-with
-        #
         # The mapping of serial ports works as in the following table:
         #
         # |    ArduSub   |       Navigator         |
@@ -224,27 +322,24 @@ class ArduPilotManager(metaclass=Singleton):
         #
         # The first column comes from https://ardupilot.org/dev/docs/sitl-serial-mapping.html
 
-        command_line = (
-            f"{firmware_path}"
-            f" -A udp:{master_endpoint.place}:{master_endpoint.argument}"
-            f" --log-directory {self.settings.firmware_folder}/logs/"
-            f" --storage-directory {self.settings.firmware_folder}/storage/"
-            f" {self.get_serial_cmdlines()}"
-            f" {self.get_default_params_cmdline(board.platform)}"
-        )
+        command_line = [
+            str(firmware_path),
+            "-A",
+            f"udp:{master_endpoint.place}:{master_endpoint.argument}",
+            "--log-directory",
+            f"{self.settings.firmware_folder}/logs/",
+            "--storage-directory",
+            f"{self.settings.firmware_folder}/storage/",
+            *self.get_serial_cmdlines(),
+            *self.get_default_params_cmdline(board.platform),
+        ]
 
         if self.firmware_has_debug_symbols(firmware_path):
             logger.info("Debug symbols found, launching with gdb server...")
-            command_line = f"gdbserver 0.0.0.0:5555 {command_line}"
-
-        logger.info(f"Using command line: '{command_line}'")
-        self.ardupilot_subprocess = subprocess.Popen(
-            command_line,
-            shell=True,
-            encoding="utf-8",
-            errors="ignore",
-            cwd=self.settings.firmware_folder,
-        )
+            command_line = ["gdbserver", "0.0.0.0:5555", *command_line]
+
+        logger.info(f"Using command line: '{shlex.join(command_line)}'")
+        await self._spawn_ardupilot(command_line)
 
         await self.start_mavlink_manager(master_endpoint)
 
@@ -316,75 +411,22 @@ class ArduPilotManager(metaclass=Singleton):
             argument=5760,
             protected=True,
         )
-        # pylint: disable=consider-using-with
-        self.ardupilot_subprocess = subprocess.Popen(
+        await self._spawn_ardupilot(
             [
-                firmware_path,
+                str(firmware_path),
                 "--model",
                 self.current_sitl_frame.value,
                 "--base-port",
                 str(master_endpoint.argument),
                 "--home",
                 "-27.563,-48.459,0.0,270.0",
-            ],
-            shell=False,
-            encoding="utf-8",
-            errors="ignore",
-            cwd=self.settings.firmware_folder,
+            ]
         )
 
         await self.start_mavlink_manager(master_endpoint)
 
     async def start_mavlink_manager(self, device: Endpoint) -> None:
-        default_endpoints = [
-            Endpoint(
-                name="GCS Server Link",
-                owner=self.settings.app_name,
-                connection_type=EndpointType.UDPServer,
-                place="0.0.0.0",
-                argument=14550,
-                persistent=True,
-                enabled=False,
-            ),
-            Endpoint(
-                name="GCS Client Link",
-                owner=self.settings.app_name,
-                connection_type=EndpointType.UDPClient,
-                place="192.168.2.1",
-                argument=14550,
-                persistent=True,
-                enabled=True,
-            ),
-            Endpoint(
-                name="MAVLink2Rest",
-                owner=self.settings.app_name,
-                connection_type=EndpointType.UDPClient,
-                place="127.0.0.1",
-                argument=14000,
-                persistent=True,
-                protected=True,
-            ),
-            Endpoint(
-                name="Internal Link",
-                owner=self.settings.app_name,
-                connection_type=EndpointType.TCPServer,
-                place="127.0.0.1",
-                argument=5777,
-                persistent=True,
-                protected=True,
-                overwrite_settings=True,
-            ),
-            Endpoint(
-                name="Ping360 Heading",
-                owner=self.settings.app_name,
-                connection_type=EndpointType.UDPServer,
-                place="0.0.0.0",
-                argument=14660,
-                persistent=True,
-                protected=True,
-            ),
-        ]
-        for endpoint in default_endpoints:
+        for endpoint in default_endpoints(self.settings.app_name):
             try:
                 self.mavlink_manager.add_endpoint(endpoint)
             except EndpointAlreadyExists:
@@ -438,54 +480,66 @@ class ArduPilotManager(metaclass=Singleton):
         real_boards = [board for board in boards if board.type != PlatformType.SITL]
         if not real_boards:
             raise RuntimeError("Only available board is SITL, and it wasn't explicitly chosen.")
-        real_boards.sort(key=lambda board: board.platform)
-        return real_boards[0]
+        return min(real_boards, key=attrgetter("platform"))
 
     def running_ardupilot_processes(self) -> List[psutil.Process]:
         """Return list of all Ardupilot process running on system."""
 
+        firmware_paths = self._firmware_paths
+
         def is_ardupilot_process(process: psutil.Process) -> bool:
             """Checks if given process is using a Ardupilot's firmware file, for any known platform."""
-            for platform in Platform:
-                firmware_path = self.firmware_manager.firmware_path(platform)
-                if str(firmware_path) in " ".join(process.cmdline()):
-                    return True
-            return False
+            # Kernel threads and processes we can't inspect have no cmdline
+            cmdline = process.info["cmdline"] or ()
+            return any(firmware_path in argument for argument in cmdline for firmware_path in firmware_paths)
 
-        return list(filter(is_ardupilot_process, psutil.process_iter()))
+        # Asking psutil only for the attributes we use avoids reading every /proc file of every process.
+        # The name is prefetched so the matched processes can be logged even after they are gone.
+        return list(filter(is_ardupilot_process, psutil.process_iter(attrs=["cmdline", "name"])))
 
     async def terminate_ardupilot_subprocess(self) -> None:
         """Terminate Ardupilot subprocess."""
         if self.ardupilot_subprocess:
-            self.ardupilot_subprocess.terminate()
-            for _ in range(10):
-                if self.ardupilot_subprocess.poll() is not None:
-                    logger.info("Ardupilot subprocess terminated.")
-                    return
-                logger.debug("Waiting for process to die...")
-                await asyncio.sleep(0.5)
-            raise ArdupilotProcessKillFail("Could not terminate Ardupilot subprocess.")
+            try:
+                self.ardupilot_subprocess.terminate()
+            except ProcessLookupError:
+                # Process already exited (e.g.: Ardupilot crashed), but it still needs to be waited and dropped
+                logger.debug("Ardupilot subprocess already exited.")
+            logger.debug("Waiting for process to die...")
+            try:
+                await asyncio.wait_for(self.ardupilot_subprocess.wait(), 5.0)
+            except asyncio.TimeoutError as error:
+                raise ArdupilotProcessKillFail("Could not terminate Ardupilot subprocess.") from error
+            logger.info("Ardupilot subprocess terminated.")
+            # Drop the finished process, so its resources don't pile up between restarts
+            self.ardupilot_subprocess = None
+            return
         logger.warning("Ardupilot subprocess already not running.")
 
     async def prune_ardupilot_processes(self) -> None:
         """Kill all system processes using Ardupilot's firmware file."""
-        for process in self.running_ardupilot_processes():
+        processes = self.running_ardupilot_processes()
+        for process in processes:
             try:
-                logger.debug(f"Killing Ardupilot process {process.name()}::{process.pid}.")
-                process.kill()
+                logger.debug(f"Terminating Ardupilot process {process.info['name']}::{process.pid}.")
+                process.terminate()
             except Exception as error:
-                logger.debug(f"Could not kill Ardupilot: {error}")
+                logger.debug(f"Could not terminate Ardupilot: {error}")
 
-            try:
-                process.wait(3)
-                continue
-            except Exception as error:
-                logger.debug(f"Ardupilot appears to be running.. going to call pkill: {error}")
+        # Wait for all of them at once, so the shutdown takes as long as the slowest process instead of their sum
+        _, alive = await asyncio.to_thread(psutil.wait_procs, processes, 2.0)
 
+        for process in alive:
             try:
-                subprocess.run(["pkill", "-9", process.pid], check=True)
+                logger.debug(f"Killing Ardupilot process {process.info['name']}::{process.pid}.")
+                process.kill()
             except Exception as error:
-                raise ArdupilotProcessKillFail(f"Failed to kill {process.name()}::{process.pid}.") from error
+                logger.debug(f"Could not kill Ardupilot: {error}")
+
+        _, alive = await asyncio.to_thread(psutil.wait_procs, alive, 2.0)
+        if alive:
+            survivors = [f"{process.info['name']}::{process.pid}" for process in alive]
+            raise ArdupilotProcessKillFail(f"Failed to kill {survivors}.")
 
     async def kill_ardupilot(self) -> None:
         self.should_be_running = False
@@ -541,10 +595,15 @@ class ArduPilotManager(metaclass=Singleton):
         await self.vehicle_manager.reboot_vehicle()
 
     def _get_configuration_endpoints(self) -> Set[Endpoint]:
-        return {Endpoint(**endpoint) for endpoint in self.configuration.get("endpoints") or []}
+        if self._configuration_endpoints is None:
+            self._configuration_endpoints = {
+                Endpoint(**endpoint) for endpoint in self.configuration.get("endpoints") or []
+            }
+        return set(self._configuration_endpoints)
 
     def _save_endpoints_to_configuration(self, endpoints: Set[Endpoint]) -> None:
         self.configuration["endpoints"] = list(map(Endpoint.as_dict, endpoints))
+        self._configuration_endpoints = set(endpoints)
 
     def _load_endpoints(self) -> None:
         """Load endpoints from the configuration file to the mavlink manager."""
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Iterable, Optional, Type
+from typing import Any, Dict, Iterable, Optional, Type, cast
 
 import validators
 from pydantic import constr, root_validator
@@ -56,10 +56,19 @@ class Endpoint:
         return [endpoint for endpoint in endpoints if endpoint.enabled is True]
 
     def __str__(self) -> str:
-        return ":".join([self.connection_type, self.place, str(self.argument)])
+        # Endpoints are hashed and compared by their string representation on every set operation, so it's computed
+        # only once. Because of that, endpoints should be treated as immutable after creation.
+        if "__str_cache__" not in self.__dict__:
+            self.__dict__["__str_cache__"] = ":".join([self.connection_type, self.place, str(self.argument)])
+        return cast(str, self.__dict__["__str_cache__"])
 
     def as_dict(self) -> Dict[str, Any]:
-        return dict(filter(lambda field: field[0] != "__initialised__", self.__dict__.items()))
+        # Like the string representation, the exported dict is built only once. A copy is returned to keep it intact.
+        if "__dict_cache__" not in self.__dict__:
+            self.__dict__["__dict_cache__"] = {
+                key: value for key, value in self.__dict__.items() if key not in ENDPOINT_INTERNAL_ATTRIBUTES
+            }
+        return dict(self.__dict__["__dict_cache__"])
 
     def __hash__(self) -> int:
         return hash(str(self))
@@ -70,6 +79,9 @@ class Endpoint:
         return str(self) == str(other)
 
 
+# Attributes stored on endpoints that are not part of their data
+ENDPOINT_INTERNAL_ATTRIBUTES = ["__initialised__", "__str_cache__", "__dict_cache__"]
+
 VALID_SERIAL_BAUDRATES = [
     3000000,
     2000000,
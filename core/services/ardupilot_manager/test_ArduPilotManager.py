@@ -0,0 +1,55 @@
+import asyncio
+import pathlib
+from types import SimpleNamespace
+
+import pytest
+
+from ArduPilotManager import ArduPilotManager
+from typedefs import FlightController, Platform
+
+
+def uninitialized_manager() -> ArduPilotManager:
+    # Bypass the singleton initialization, which touches the system's settings and firmware folders
+    return object.__new__(ArduPilotManager)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_terminate_exited_subprocess() -> None:
+    manager = uninitialized_manager()
+    manager.ardupilot_subprocess = await asyncio.create_subprocess_exec("sh", "-c", "exit 1")
+    await manager.ardupilot_subprocess.wait()
+
+    await manager.terminate_ardupilot_subprocess()
+    assert manager.ardupilot_subprocess is None, "Exited subprocess was not dropped."
+
+
+@pytest.mark.asyncio
+async def test_auto_restart_rate_limit(tmp_path: pathlib.Path) -> None:
+    manager = uninitialized_manager()
+    manager.settings = SimpleNamespace(firmware_folder=tmp_path)  # type: ignore
+    manager._current_board = FlightController(name="SITL", manufacturer="ArduPilot Team", platform=Platform.SITL)
+    manager._should_be_running = True
+    manager._restart_event = asyncio.Event()
+    manager._restart_event.set()
+    manager._subprocess_watcher = None
+    manager._last_restart_time = None
+    manager._firmware_paths = []
+    manager.ardupilot_subprocess = None
+
+    starts = 0
+
+    async def kill_ardupilot() -> None:
+        pass
+
+    async def start_ardupilot() -> None:
+        nonlocal starts
+        starts += 1
+        # Simulate a firmware that crashes right after starting
+        await manager._spawn_ardupilot(["sh", "-c", "sleep 0.3"])
+
+    manager.kill_ardupilot = kill_ardupilot  # type: ignore
+    manager.start_ardupilot = start_ardupilot  # type: ignore
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(manager.auto_restart_ardupilot(), 6.0)
+    assert starts == 2, f"Ardupilot was restarted {starts} times in 6 seconds."